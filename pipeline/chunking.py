@@ -0,0 +1,113 @@
+import hashlib
+import functools
+from typing import Dict, Iterable, Iterator, List
+import numpy as np
+from tokenizers import Tokenizer
+from langchain_core.documents import Document
+
+# --- Configuration ---
+# Chunks are measured in the embedding model's own tokens. MiniLM reads at most 256 tokens
+# including [CLS] and [SEP], so 254 content tokens fill its window without truncation.
+TOKENIZER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_TOKENS = 254  # The number of tokens in each chunk
+CHUNK_OVERLAP_TOKENS = 32  # The number of tokens to overlap between chunks
+
+# Near-duplicate chunk filtering (nav/header/footer boilerplate): 64-bit SimHash over
+# word 5-gram shingles; chunks within this Hamming distance of a kept chunk are dropped.
+SHINGLE_WORDS = 5
+SIMHASH_MAX_DISTANCE = 3
+
+
+@functools.lru_cache(maxsize=1)
+def get_tokenizer() -> Tokenizer:
+    tokenizer = Tokenizer.from_pretrained(TOKENIZER_NAME)
+    # The hub tokenizer ships with truncation/padding settings meant for inference
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+def split_documents(documents: List[Document]) -> List[Document]:
+    """
+    Splits the documents into overlapping windows of model tokens. All documents are
+    tokenized in one batch by the Rust tokenizer, and each chunk is sliced from the
+    original text using the token character offsets.
+    """
+    encodings = get_tokenizer().encode_batch([doc.page_content for doc in documents], add_special_tokens=False)
+
+    step = CHUNK_TOKENS - CHUNK_OVERLAP_TOKENS
+    chunked_documents = []
+    for doc, encoding in zip(documents, encodings):
+        offsets = encoding.offsets
+        for start in range(0, len(offsets), step):
+            end = min(start + CHUNK_TOKENS, len(offsets))
+            start_index = offsets[start][0]
+            chunked_documents.append(Document(
+                page_content=doc.page_content[start_index:offsets[end - 1][1]],
+                metadata={**doc.metadata, 'start_index': start_index},
+            ))
+            if end == len(offsets):
+                break
+    return chunked_documents
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of a text's word shingles (bit votes are tallied with numpy)."""
+    words = text.lower().split()
+    if not words:
+        return 0
+    shingles = {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    digests = b''.join(hashlib.blake2b(sh.encode('utf-8'), digest_size=8).digest() for sh in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    votes = bits.sum(axis=0) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes).tobytes(), 'big')
+
+
+def iter_unique_chunks(chunks: Iterable[Document]) -> Iterator[Document]:
+    """
+    Yields chunks, skipping any whose SimHash is within SIMHASH_MAX_DISTANCE bits of an
+    earlier yielded chunk. Works on a stream: only the kept signatures are held in memory.
+    Signatures are bucketed by SIMHASH_MAX_DISTANCE + 1 bit bands: any two signatures that
+    close must agree exactly on at least one band, so only same-bucket pairs are compared.
+    """
+    num_bands = SIMHASH_MAX_DISTANCE + 1
+    band_bits = 64 // num_bands
+    band_mask = (1 << band_bits) - 1
+    buckets = [{} for _ in range(num_bands)]
+
+    for chunk in chunks:
+        signature = simhash(chunk.page_content)
+        keys = [(signature >> (band * band_bits)) & band_mask for band in range(num_bands)]
+        is_duplicate = any(
+            bin(signature ^ other).count('1') <= SIMHASH_MAX_DISTANCE
+            for band, key in enumerate(keys)
+            for other in buckets[band].get(key, ())
+        )
+        if is_duplicate:
+            continue
+        for band, key in enumerate(keys):
+            buckets[band].setdefault(key, []).append(signature)
+        yield chunk
+
+
+def deduplicate_chunks(chunks: Iterable[Document]) -> List[Document]:
+    """List form of iter_unique_chunks, for builds that hold every chunk anyway."""
+    return list(iter_unique_chunks(chunks))
+
+
+def chunk_id(chunk: Document) -> str:
+    """Deterministic id for a chunk, derived from its source URL and character offset."""
+    key = f"{chunk.metadata['source']}::{chunk.metadata['start_index']}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def chunks_by_id(chunks: List[Document]) -> Dict[str, Document]:
+    """
+    Maps chunk ids to chunks in sorted id order, keeping the first chunk for a repeated id.
+    Inserting in id order keeps SQLite B-tree writes on the append path instead of
+    splitting random pages.
+    """
+    by_id: Dict[str, Document] = {}
+    for chunk in chunks:
+        by_id.setdefault(chunk_id(chunk), chunk)
+    return {key: by_id[key] for key in sorted(by_id)}
@@ -1,13 +1,18 @@
-import os
+import re
+import logging
 import json
-import google.generativeai as genai
-from typing import Dict, Any
+import time
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
 
-# Import the prompt template from the separate prompts file
-from pipeline.prompts import CLASSIFICATION_PROMPT
+# Import the prompt templates from the separate prompts file
+from pipeline.prompts import CLASSIFICATION_PROMPT, CLASSIFICATION_BATCH_PROMPT
+from pipeline.gemini import get_genai
+from pipeline.ratelimit import RateLimiter
 
 # --- Part 1: Configuration ---
-# Configure the Gemini API key from environment variables
+# Load environment variables; the Gemini client itself is configured lazily by get_genai()
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -15,22 +20,67 @@ except ImportError:
     # This is fine if dotenv is not installed, especially in deployed environments
     pass
 
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise ValueError("GOOGLE_API_KEY environment variable not set. Please create a .env file and set it.")
-genai.configure(api_key=api_key)
+logger = logging.getLogger(__name__)
+
+# Optional lenient parser used to recover from trailing commas and similar LLM slips
+try:
+    import json5
+except ImportError:
+    json5 = None
+
+
+# Inputs shorter than this carry no signal worth an LLM call
+MIN_TICKET_CHARS = 3
+# Longer tickets (e.g. pasted logs) are truncated before prompting to bound tokens and latency
+MAX_TICKET_CHARS = 8000
+# Keys every classification returned by the LLM must contain
+REQUIRED_KEYS = ["topic_tags", "sentiment", "priority"]
+# Gemini free tier quota: 15 requests per 60-second window
+REQUESTS_PER_MINUTE = 15
+RATE_LIMIT_PERIOD = 60.0
+
+# Shared by every classify_ticket_with_retry call in this process
+_rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, RATE_LIMIT_PERIOD)
 
 
 # --- Part 2: Core Classification Logic ---
+_CODE_FENCE_RE = re.compile(r"```(?:json)?")
+
 def _clean_llm_response(response_text: str) -> str:
     """
     Private helper function to clean the LLM's raw response.
     It removes markdown code fences and leading/trailing whitespace,
     making the string more reliable for JSON parsing.
     """
-    cleaned_text = response_text.strip().replace("```json", "").replace("```", "")
+    cleaned_text = _CODE_FENCE_RE.sub("", response_text.strip())
     return cleaned_text.strip()
 
+def _parse_llm_json(cleaned_text: str) -> Any:
+    """
+    Parses the cleaned LLM response strictly with orjson, falling back to json5
+    (when installed) for near-JSON output. Raises the strict JSONDecodeError if both fail.
+    """
+    try:
+        return orjson.loads(cleaned_text)
+    except orjson.JSONDecodeError as strict_error:
+        if json5 is None:
+            raise
+        try:
+            return json5.loads(cleaned_text)
+        except ValueError:
+            raise strict_error
+
+def _precheck_ticket(ticket_text: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns a result for input that shouldn't reach the LLM (blank or trivially short),
+    or None if the (already stripped) ticket text needs a real classification.
+    """
+    if not ticket_text:
+        return {"error": "Input ticket text cannot be empty."}
+    if len(ticket_text) < MIN_TICKET_CHARS:
+        return {"topic_tags": [], "sentiment": "Neutral", "priority": "P2 (Low)"}
+    return None
+
 def classify_ticket(ticket_text: str) -> Dict[str, Any]:
     """
     Takes a ticket text string, calls the Gemini LLM for classification,
@@ -38,21 +88,23 @@ def classify_ticket(ticket_text: str) -> Dict[str, Any]:
 
     This is the primary function that will be imported and used by the main app.py.
     """
-    if not ticket_text:
-        return {"error": "Input ticket text cannot be empty."}
+    ticket_text = (ticket_text or "").strip()
+    precheck = _precheck_ticket(ticket_text)
+    if precheck is not None:
+        return precheck
+    ticket_text = ticket_text[:MAX_TICKET_CHARS]
 
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        model = get_genai().GenerativeModel('gemini-2.5-flash')
         prompt = CLASSIFICATION_PROMPT.format(ticket_text=ticket_text)
         
         response = model.generate_content(prompt)
         
         cleaned_response = _clean_llm_response(response.text)
-        classification = json.loads(cleaned_response)
+        classification = _parse_llm_json(cleaned_response)
         
         # Validate that the response contains the keys we expect
-        required_keys = ["topic_tags", "sentiment", "priority"]
-        if not all(key in classification for key in required_keys):
+        if not all(key in classification for key in REQUIRED_KEYS):
             raise ValueError(f"LLM response is missing one or more required keys. Got: {classification.keys()}")
 
         return classification
@@ -70,38 +122,109 @@ def classify_ticket(ticket_text: str) -> Dict[str, Any]:
             "error": f"An unexpected error occurred: {str(e)}"
         }
 
+def classify_ticket_with_retry(ticket_text: str, max_retries: int = 3, backoff: float = RATE_LIMIT_PERIOD) -> Dict[str, Any]:
+    """
+    Wraps classify_ticket for bulk runs: every attempt waits for a slot in the shared
+    per-minute quota, and a rate-limit (HTTP 429) error backs off exponentially, starting
+    at a full quota window so the retry lands in a fresh one.
+    """
+    _rate_limiter.acquire()
+    result = classify_ticket(ticket_text)
+    for attempt in range(max_retries):
+        if "429" not in str(result.get("error", "")):
+            break
+        time.sleep(backoff * (2 ** attempt))
+        _rate_limiter.acquire()
+        result = classify_ticket(ticket_text)
+    return result
+
+def classify_tickets_batch(ticket_texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Classifies several tickets with a single Gemini call, returning one result per
+    input in the same order. Blank or trivial tickets are answered without the LLM.
+    If the batch call or its response is unusable, each affected ticket gets an error dict.
+    """
+    results: List[Optional[Dict[str, Any]]] = []
+    pending: List[int] = []
+    for i, text in enumerate(ticket_texts):
+        text = (text or "").strip()
+        precheck = _precheck_ticket(text)
+        results.append(precheck)
+        if precheck is None:
+            pending.append(i)
+
+    if not pending:
+        return results
+
+    tickets_block = "\n\n".join(
+        f"Ticket {n}:\n```{ticket_texts[i].strip()[:MAX_TICKET_CHARS]}```" for n, i in enumerate(pending)
+    )
+    try:
+        model = get_genai().GenerativeModel('gemini-2.5-flash')
+        prompt = CLASSIFICATION_BATCH_PROMPT.format(ticket_count=len(pending), tickets=tickets_block)
+
+        response = model.generate_content(prompt)
+
+        classifications = _parse_llm_json(_clean_llm_response(response.text))
+        if not isinstance(classifications, list) or len(classifications) != len(pending):
+            raise ValueError(f"Expected a JSON list of {len(pending)} classifications from the LLM.")
+    except Exception as e:
+        error = {"error": f"Batch classification failed: {str(e)}"}
+        for i in pending:
+            results[i] = dict(error)
+        return results
+
+    for i, classification in zip(pending, classifications):
+        if isinstance(classification, dict) and all(key in classification for key in REQUIRED_KEYS):
+            results[i] = {key: classification[key] for key in REQUIRED_KEYS}
+        else:
+            results[i] = {"error": "LLM response is missing one or more required keys.", "raw_response": str(classification)}
+    return results
+
 # --- Part 3: Standalone Execution for Bulk Processing ---
 if __name__ == "__main__":
     # Note: These paths assume you are running the script from the `backend/` directory.
     # python -m pipeline.classifier
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
     input_filename = "data/sample_tickets.json"
     output_filename = "data/classified_tickets.json"
 
     try:
-        with open(input_filename, 'r') as f:
-            all_tickets = json.load(f)
+        with open(input_filename, 'rb') as f:
+            all_tickets = orjson.loads(f.read())
     except FileNotFoundError:
         exit()
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         exit()
 
+    # Calls are network-bound, so overlap them; the shared rate limiter keeps the pool
+    # inside the API quota, and map() preserves input order
+    tickets_with_body = [ticket for ticket in all_tickets if ticket.get("body")]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda t: classify_ticket_with_retry(t["body"]), tickets_with_body))
+
     classification_results = []
-    for i, ticket in enumerate(all_tickets, 1):
-        ticket_id = ticket.get('id', 'N/A')
-        
-        ticket_body = ticket.get("body")
-        if not ticket_body:
+    failed_tickets = []
+    for ticket, result in zip(tickets_with_body, results):
+        # Failures are reported rather than saved as if they were classifications
+        if "error" in result:
+            failed_tickets.append((ticket.get("id", "N/A"), result["error"]))
             continue
-            
-        result = classify_ticket(ticket_body)
-        
         classified_ticket = ticket.copy()
         classified_ticket['classification'] = result
         
         classification_results.append(classified_ticket)
 
+    if failed_tickets:
+        logger.error(
+            "🚨 %d of %d tickets could not be classified and were not saved.",
+            len(failed_tickets), len(tickets_with_body),
+        )
+        for ticket_id, error in failed_tickets:
+            logger.error("  - %s: %s", ticket_id, error)
+
     try:
-        with open(output_filename, 'w') as f:
-            json.dump(classification_results, f, indent=4)
+        with open(output_filename, 'wb') as f:
+            f.write(orjson.dumps(classification_results, option=orjson.OPT_INDENT_2))
     except Exception as e:
         pass
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os
+import functools
+from typing import Dict, Any
+from langchain_huggingface import HuggingFaceEmbeddings
+
+# --- Configuration ---
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# "torch" (default) or "onnx"; the ONNX backend also needs the `sentence-transformers[onnx]` extra
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Dynamic int8 export published alongside the model on the Hugging Face hub
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+
+
+def best_device() -> str:
+    """Picks the fastest available device for the encoder (cuda, then mps, then cpu)."""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def build_embeddings() -> HuggingFaceEmbeddings:
+    """
+    Creates the embedding model used for both indexing and queries.
+    With EMBEDDING_BACKEND=onnx the int8-quantized ONNX export runs on onnxruntime's
+    CPU provider instead of the FP32 PyTorch model.
+    """
+    model_kwargs: Dict[str, Any] = {"device": best_device()}
+    if EMBEDDING_BACKEND == "onnx":
+        model_kwargs = {
+            "backend": "onnx",
+            "model_kwargs": {"file_name": EMBEDDING_ONNX_FILE, "provider": "CPUExecutionProvider"},
+        }
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs=model_kwargs,
+        # Larger batches keep the encoder's matmuls busy during index builds
+        encode_kwargs={"batch_size": 64, "normalize_embeddings": True},
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_embedder() -> HuggingFaceEmbeddings:
+    """
+    The process-wide embedding model. Loading weights and tokenizer takes seconds,
+    so every pipeline, script and test in one process shares this instance.
+    """
+    return build_embeddings()
@@ -0,0 +1,18 @@
+import os
+import functools
+
+
+@functools.lru_cache(maxsize=1)
+def get_genai():
+    """
+    Imports and configures the Gemini SDK on first use, so importing the pipeline
+    modules neither requires GOOGLE_API_KEY nor pays the SDK import cost up front.
+    A missing key raises on every call until it is set (failures are not cached).
+    """
+    import google.generativeai as genai
+
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable not set. Please create a .env file and set it.")
+    genai.configure(api_key=api_key)
+    return genai
@@ -33,6 +33,38 @@ Please analyze the following ticket and provide the classification in a structur
 **JSON Classification:**
 """
 
+CLASSIFICATION_BATCH_PROMPT = """
+You are an expert AI assistant for 'Atlan', a data catalog and governance company.
+Your task is to analyze and classify customer support tickets based on their content.
+
+Please analyze each of the following {ticket_count} tickets independently and provide the classifications in a structured JSON format.
+
+**Classification Schema (for each ticket):**
+1.  **topic_tags**: A list of relevant tags. Choose one or more from this specific list:
+    ["How-to", "Product", "Connector", "Lineage", "API/SDK", "SSO", "Glossary", "Best practices", "Sensitive data", "Access Control", "Automation", "Troubleshooting"]
+2.  **sentiment**: The user's sentiment. Choose one from:
+    ["Frustrated", "Curious", "Angry", "Neutral", "Positive"]
+3.  **priority**: The urgency and impact of the issue. Choose one from:
+    ["P0 (High)", "P1 (Medium)", "P2 (Low)"]
+
+**Rules:**
+-   Analyze each ticket's content carefully to understand the user's problem and tone. Do not let one ticket influence another.
+-   Assign priority based on keywords like "urgent," "blocked," "critical failure," or the number of users impacted. A simple question is likely P2, while a team being blocked is P1 or P0.
+-   Your response MUST be only a JSON list with exactly {ticket_count} objects, one per ticket, in the same order as the tickets. No additional text, explanations, or markdown formatting.
+
+**Example JSON Output (for 2 tickets):**
+[
+    {{"topic_tags": ["Connector", "Lineage"], "sentiment": "Frustrated", "priority": "P0 (High)"}},
+    {{"topic_tags": ["How-to"], "sentiment": "Curious", "priority": "P2 (Low)"}}
+]
+
+---
+**Tickets to Classify:**
+{tickets}
+
+**JSON Classifications:**
+"""
+
 RAG_PROMPT_TEMPLATE = """
 You are a helpful and friendly AI assistant for 'Atlan'. Answer the user's question based ONLY on the Context.
 
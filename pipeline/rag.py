@@ -1,29 +1,93 @@
 import os
-import json
-import google.generativeai as genai
-from typing import Dict, Any, List
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.docstore.document import Document
-from langchain_huggingface import HuggingFaceEmbeddings
+import hashlib
+import functools
+from itertools import islice
+import orjson
+from typing import Dict, Any, Iterable, Iterator, List
+from langchain_core.documents import Document
 from langchain_chroma import Chroma
 from .prompts import RAG_PROMPT_TEMPLATE
+from .gemini import get_genai
+from .embeddings import EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, get_embedder
+from .chunking import split_documents, iter_unique_chunks, chunks_by_id
+
+# Optional: stream the knowledge base instead of loading it whole
+try:
+    import ijson
+except ImportError:
+    ijson = None  # type: ignore
+
+# Optional: persist question embeddings across restarts
+try:
+    import diskcache
+except ImportError:
+    diskcache = None  # type: ignore
 
 # --- Configuration ---
 VECTOR_STORE_PATH = os.getenv("CHROMA_DB_PATH", "data/chroma_db")
 KNOWLEDGE_BASE_PATH = os.getenv("KNOWLEDGE_BASE_PATH", "data/knowledge_base.json")
-EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "data/embed_cache")
+EMBED_CACHE_SIZE_LIMIT = 512 * 1024 * 1024
+RETRIEVAL_K = 8
+# Of the RETRIEVAL_K context chunks, up to this many are drawn from official Atlan docs first
+OFFICIAL_RETRIEVAL_K = 6
+OFFICIAL_SOURCE_DOMAINS = ("docs.atlan.com", "developer.atlan.com")
+# Chunks embedded and written per Chroma add when building the store
+INDEX_BATCH_SIZE = 256
+# Chroma already serves queries from an HNSW graph; these are applied when the store is built.
+# MiniLM embeddings are unit-normalized, so cosine ranks identically to the default L2.
+HNSW_COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+}
 
-# Configure the Gemini API key
+# Load environment variables; the Gemini client itself is configured lazily by get_genai()
 try:
     from dotenv import load_dotenv
     load_dotenv()
 except ImportError:
     pass
 
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise ValueError("GOOGLE_API_KEY environment variable not set.")
-genai.configure(api_key=api_key)
+
+def is_official_source(url: str) -> bool:
+    """True for URLs on Atlan's official documentation domains (stored as chunk metadata)."""
+    src = (url or '').lower()
+    return any(domain in src for domain in OFFICIAL_SOURCE_DOMAINS)
+
+
+def iter_knowledge_base(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields knowledge base records one at a time from either a JSON array or JSON Lines
+    (what scripts/build_knowledge_base.py writes). Arrays are streamed with ijson when
+    available. A missing or malformed file ends the stream early.
+    """
+    try:
+        with open(path, 'rb') as f:
+            is_array = f.read(64).lstrip().startswith(b'[')
+            f.seek(0)
+            if not is_array:
+                for line in f:
+                    if line.strip():
+                        yield orjson.loads(line)
+            elif ijson is not None:
+                yield from ijson.items(f, 'item')
+            else:
+                yield from orjson.loads(f.read())
+    except Exception:
+        return
+
+
+def create_documents_from_data(data: Iterable[Dict[str, Any]]) -> List[Document]:
+    """Converts knowledge base records into LangChain Documents tagged with their source."""
+    return [
+        Document(
+            page_content=item['content'],
+            metadata={'source': item.get('url', ''), 'official': is_official_source(item.get('url', ''))},
+        )
+        for item in data if item.get('content')
+    ]
 
 
 class RAGPipeline:
@@ -32,8 +96,63 @@ class RAGPipeline:
     It loads the vector store once and can be used to answer multiple queries.
     """
     def __init__(self):
+        self.embeddings = get_embedder()
         self.vector_store = self._load_vector_store()
-        self.llm = genai.GenerativeModel('gemini-2.5-flash')
+        self.llm = get_genai().GenerativeModel('gemini-2.5-flash')
+        self._disk_cache = self._open_embed_cache()
+        # Per-instance memo of question embeddings; repeated questions skip the encoder
+        self._embed_query = functools.lru_cache(maxsize=1024)(self._embed_query_uncached)
+
+    @staticmethod
+    def _open_embed_cache():
+        """Opens the on-disk embedding cache, or returns None if unavailable (e.g. read-only FS)."""
+        if diskcache is None:
+            return None
+        try:
+            return diskcache.Cache(EMBED_CACHE_DIR, size_limit=EMBED_CACHE_SIZE_LIMIT)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _embed_cache_key(normalized_question: str) -> bytes:
+        # Model and backend are part of the key so switching either never serves stale vectors
+        return hashlib.blake2b(
+            f"{EMBEDDING_MODEL_NAME}|{EMBEDDING_BACKEND}|{normalized_question}".encode("utf-8"),
+            digest_size=16,
+        ).digest()
+
+    def _embed_query_uncached(self, normalized_question: str) -> tuple:
+        if self._disk_cache is None:
+            return tuple(self.embeddings.embed_query(normalized_question))
+
+        key = self._embed_cache_key(normalized_question)
+        vector = self._disk_cache.get(key)
+        if vector is None:
+            vector = tuple(self.embeddings.embed_query(normalized_question))
+            self._disk_cache.set(key, vector)
+        return vector
+
+    def embed_queries(self, questions: List[str]) -> List[List[float]]:
+        """
+        Embeds many questions in one batched encoder pass, for use with
+        get_rag_answer_from_embedding. Disk-cached vectors are reused and new ones stored.
+        """
+        normalized = [q.strip().lower() for q in questions]
+        vectors: Dict[str, tuple] = {}
+        misses = []
+        for q in dict.fromkeys(normalized):
+            cached = self._disk_cache.get(self._embed_cache_key(q)) if self._disk_cache is not None else None
+            if cached is None:
+                misses.append(q)
+            else:
+                vectors[q] = cached
+
+        if misses:
+            for q, vector in zip(misses, self.embeddings.embed_documents(misses)):
+                vectors[q] = tuple(vector)
+                if self._disk_cache is not None:
+                    self._disk_cache.set(self._embed_cache_key(q), vectors[q])
+        return [list(vectors[q]) for q in normalized]
         
     def query(self, question: str, context: str = "") -> str:
         """
@@ -63,6 +182,7 @@ class RAGPipeline:
         """
         Build the local Chroma vector store from the knowledge base if it doesn't exist.
         This is intended for simple POC deployments where we don't ship large artifacts.
+        Chunks are split, deduplicated and keyed exactly as scripts/vector_store_script.py does.
         """
         # If the directory already exists and is non-empty, assume it's usable
         if os.path.isdir(VECTOR_STORE_PATH) and any(os.scandir(VECTOR_STORE_PATH)):
@@ -72,49 +192,44 @@ class RAGPipeline:
         if not os.path.isfile(KNOWLEDGE_BASE_PATH):
             return
 
-        try:
-            with open(KNOWLEDGE_BASE_PATH, 'r', encoding='utf-8') as f:
-                kb_data = json.load(f)
-        except Exception:
-            kb_data = []
-
-        if not kb_data:
-            return
-
-        # Convert to Documents
-        documents: List[Document] = [
-            Document(page_content=item.get('content', ''), metadata={'source': item.get('url', '')})
-            for item in kb_data
-            if item.get('content')
-        ]
-        if not documents:
+        chunks = self._iter_kb_chunks()
+        batch = list(islice(chunks, INDEX_BATCH_SIZE))
+        if not batch:
             return
 
-        # Split documents
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        chunks = splitter.split_documents(documents)
-        if not chunks:
-            return
-
-        # Build and persist vector store
+        # Build and persist vector store, embedding one bounded batch at a time
         os.makedirs(VECTOR_STORE_PATH, exist_ok=True)
-        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
-        Chroma.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            persist_directory=VECTOR_STORE_PATH
+        vector_store = Chroma(
+            persist_directory=VECTOR_STORE_PATH,
+            embedding_function=self.embeddings,
+            collection_metadata=HNSW_COLLECTION_METADATA,
         )
+        while batch:
+            # Ids are sorted (and repeats dropped) within each batch only, so memory stays bounded
+            indexed = chunks_by_id(batch)
+            vector_store.add_documents(list(indexed.values()), ids=list(indexed))
+            batch = list(islice(chunks, INDEX_BATCH_SIZE))
+
+    def _iter_kb_chunks(self) -> Iterator[Document]:
+        """
+        Lazily splits knowledge base records into deduplicated chunks, one record at a time,
+        with the same token windows and SimHash filter as scripts/vector_store_script.py.
+        """
+        def split_records():
+            for item in iter_knowledge_base(KNOWLEDGE_BASE_PATH):
+                yield from split_documents(create_documents_from_data([item]))
+
+        return iter_unique_chunks(split_records())
 
     def _load_vector_store(self):
         """Loads the ChromaDB vector store from the specified path. Builds it if missing (POC)."""
         # Ensure the store exists for POC flows
         self._ensure_local_vector_store()
 
-        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
         try:
             return Chroma(
                 persist_directory=VECTOR_STORE_PATH,
-                embedding_function=embeddings
+                embedding_function=self.embeddings
             )
         except Exception:
             return None
@@ -126,10 +241,35 @@ class RAGPipeline:
         """
         if self.vector_store is None:
             return {"error": "Vector store is not available."}
-        
+
+        # The MiniLM tokenizer is uncased, so lowercasing only widens cache hits
+        query_vector = list(self._embed_query(question.strip().lower()))
+        return self.get_rag_answer_from_embedding(query_vector, question)
+
+    def get_rag_answer_from_embedding(self, query_vector: List[float], question: str) -> Dict[str, Any]:
+        """
+        Same as get_rag_answer, but retrieves with a precomputed question embedding
+        (see embed_queries) instead of encoding the question again.
+        """
+        if self.vector_store is None:
+            return {"error": "Vector store is not available."}
+
         # 1. Retrieve relevant documents (context)
-        retriever = self.vector_store.as_retriever(search_kwargs={"k": 8})
-        relevant_docs = retriever.invoke(question)
+        # Official docs are fetched first via a metadata filter pushed down to Chroma, then
+        # topped up to RETRIEVAL_K from an unfiltered search. That search asks for the full
+        # RETRIEVAL_K because its best hits are usually the official chunks we already have.
+        official_docs = self.vector_store.similarity_search_by_vector(
+            query_vector, k=OFFICIAL_RETRIEVAL_K, filter={"official": True}
+        )
+        other_docs = self.vector_store.similarity_search_by_vector(query_vector, k=RETRIEVAL_K)
+        relevant_docs = list(official_docs)
+        seen_content = {doc.page_content for doc in relevant_docs}
+        for doc in other_docs:
+            if len(relevant_docs) >= RETRIEVAL_K:
+                break
+            if doc.page_content not in seen_content:
+                seen_content.add(doc.page_content)
+                relevant_docs.append(doc)
 
         if not relevant_docs:
             return {
@@ -138,16 +278,7 @@ class RAGPipeline:
             }
             
         # 2. Format the context and prompt
-        # Prefer Atlan official domains first when building sources
-        def source_key(doc):
-            src = (doc.metadata.get('source', '') or '').lower()
-            if 'docs.atlan.com' in src or 'developer.atlan.com' in src:
-                return (0, src)
-            return (1, src)
-
-        # Sort docs to prioritize official domains without losing content
-        sorted_docs = sorted(relevant_docs, key=source_key)
-        context_str = "\n\n".join([doc.page_content for doc in sorted_docs])
+        context_str = "\n\n".join([doc.page_content for doc in relevant_docs])
         prompt = RAG_PROMPT_TEMPLATE.format(context=context_str, question=question)
 
         # 3. Generate the answer using the LLM
@@ -156,7 +287,7 @@ class RAGPipeline:
             
             # 4. Extract and format sources
             sources = []
-            for doc in sorted_docs:
+            for doc in relevant_docs:
                 source_url = doc.metadata.get('source', 'N/A')
                 if source_url != 'N/A' and source_url not in sources:
                     sources.append(source_url)
@@ -0,0 +1,27 @@
+import time
+import threading
+from collections import deque
+
+
+class RateLimiter:
+    """
+    A thread-safe sliding-window rate limiter: at most `rate` calls to acquire()
+    succeed in any `period`-second window; extra callers sleep until a slot frees up.
+    """
+    def __init__(self, rate: int, period: float = 1.0):
+        self.rate = rate
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.rate:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
@@ -1,9 +1,15 @@
 import os
-import json
-import time
+import orjson
+import hashlib
+import threading
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+from pipeline.ratelimit import RateLimiter
 
 # --- Configuration ---
 
@@ -13,7 +19,7 @@ START_URLS = [
     "https://developer.atlan.com/"
 ]
 
-# The path where the final scraped data will be saved.
+# The path where the scraped data will be saved, as JSON Lines (one page record per line).
 SAVE_PATH = "data/knowledge_base.json"
 
 # It's a good practice to identify your scraper with a User-Agent.
@@ -21,6 +27,111 @@ HEADERS = {
     'User-Agent': 'AtlanSupportCopilotBot/1.0'
 }
 
+# lxml's C parser is several times faster than the pure-Python html.parser; use it when installed.
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Pages fetched in parallel, and the per-host request budget that keeps us polite.
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND_PER_HOST = 8
+REQUEST_TIMEOUT = 20
+
+# One session for the whole crawl so TCP/TLS connections are reused between pages.
+# The adapter keeps one keep-alive pool per start domain, sized to the worker count,
+# and retries transient failures instead of dropping the page.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_adapter = HTTPAdapter(
+    pool_connections=len(START_URLS),
+    pool_maxsize=MAX_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+# Query parameters that only track campaigns and never change the page served.
+TRACKING_PARAMS = {'gclid', 'fbclid'}
+TRACKING_PARAM_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Parsed robots.txt per origin. Each origin has its own lock, so a slow robots.txt
+# only holds up workers waiting on that same host.
+_robots = {}
+_robots_locks = {}
+_robots_locks_lock = threading.Lock()
+
+# Hashes of page bodies already scraped, so mirrors/aliases of one page are parsed once.
+_seen_content = set()
+_seen_content_lock = threading.Lock()
+
+# --- Helpers ---
+
+def fetch(url: str) -> requests.Response:
+    """GETs a URL through the shared session, waiting for that host's rate limiter."""
+    host = urlparse(url).netloc
+    with _host_limiters_lock:
+        limiter = _host_limiters.setdefault(host, RateLimiter(REQUESTS_PER_SECOND_PER_HOST, 1.0))
+    limiter.acquire()
+    return SESSION.get(url, timeout=REQUEST_TIMEOUT)
+
+def canonicalize(url: str) -> str:
+    """
+    Normalizes a URL so variants of the same page (case, default port, tracking params,
+    param order, duplicate slashes, trailing /index.html, fragment) collapse to one key.
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+
+    path = parsed.path
+    while '//' in path:
+        path = path.replace('//', '/')
+    if path.endswith('/index.html'):
+        path = path[:-len('index.html')]
+    path = path or '/'
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ))
+    return urlunparse((scheme, host, path, '', query, ''))
+
+def is_allowed(url: str) -> bool:
+    """Checks the host's robots.txt (fetched once per host) for our User-Agent."""
+    parsed = urlparse(url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    with _robots_locks_lock:
+        origin_lock = _robots_locks.setdefault(origin, threading.Lock())
+    with origin_lock:
+        parser = _robots.get(origin)
+        if parser is None:
+            parser = RobotFileParser()
+            try:
+                response = fetch(f"{origin}/robots.txt")
+                # Missing robots.txt means everything is allowed
+                parser.parse(response.text.splitlines() if response.ok else [])
+            except requests.RequestException:
+                parser.parse([])
+            _robots[origin] = parser
+    return parser.can_fetch(HEADERS['User-Agent'], url)
+
+def is_new_content(content: bytes) -> bool:
+    """Records a page body's hash; False if an identical body was already seen."""
+    digest = hashlib.blake2b(content, digest_size=16).digest()
+    with _seen_content_lock:
+        if digest in _seen_content:
+            return False
+        _seen_content.add(digest)
+        return True
+
 # --- Core Logic ---
 
 def get_all_links(base_url: str) -> set:
@@ -28,11 +139,15 @@ def get_all_links(base_url: str) -> set:
     Crawls a starting URL to find all unique, same-domain links.
     """
     found_links = set()
+    if not is_allowed(base_url):
+        return found_links
+
     try:
-        response = requests.get(base_url, headers=HEADERS)
+        response = fetch(base_url)
         response.raise_for_status() # Raise an exception for bad status codes
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        # Only <a href> tags matter here, so skip building the rest of the tree
+        soup = BeautifulSoup(response.content, HTML_PARSER, parse_only=SoupStrainer('a', href=True))
         base_domain = urlparse(base_url).netloc
         
         for a_tag in soup.find_all('a', href=True):
@@ -42,8 +157,8 @@ def get_all_links(base_url: str) -> set:
             
             # Keep the link only if it belongs to the same domain
             if urlparse(full_url).netloc == base_domain:
-                # Clean off any URL fragments (#section-links)
-                found_links.add(full_url.split('#')[0])
+                # Canonical form drops fragments (#section-links) and other URL variants
+                found_links.add(canonicalize(full_url))
                 
     except requests.RequestException as e:
         pass
@@ -55,11 +170,18 @@ def scrape_page_content(url: str) -> dict | None:
     Scrapes the main textual content from a single URL.
     Returns a dictionary with the URL and its content, or None on failure.
     """
+    if not is_allowed(url):
+        return None
+
     try:
-        response = requests.get(url, headers=HEADERS)
+        response = fetch(url)
         response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
+
+        # The same page served under another URL is skipped before parsing
+        if not is_new_content(response.content):
+            return None
+
+        soup = BeautifulSoup(response.content, HTML_PARSER)
         
         # **This is the most important part to customize.**
         # We need to find the main content container. After inspecting the sites,
@@ -84,29 +206,23 @@ def scrape_page_content(url: str) -> dict | None:
 if __name__ == "__main__":
     all_site_links = set()
     
-    # 1. Discover all links from the starting URLs
-    for url in START_URLS:
-        links = get_all_links(url)
-        all_site_links.update(links)
-    
-    scraped_data = []
-    
-    # 2. Scrape the content from each unique link
-    total_links = len(all_site_links)
-    for i, link in enumerate(list(all_site_links), 1):
-        content_dict = scrape_page_content(link)
-        if content_dict and content_dict['content']:
-            scraped_data.append(content_dict)
-        
-        # Be a good web citizen! Wait 1 second between requests.
-        time.sleep(1)
-        
-    # 3. Save the final data to a JSON file
-    try:
-        # Ensure the 'data' directory exists
-        os.makedirs(os.path.dirname(SAVE_PATH), exist_ok=True)
-        
-        with open(SAVE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(scraped_data, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        pass
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # 1. Discover all links from the starting URLs. The set of canonical URLs is
+        # the crawl frontier, so each page is fetched once however many variants link to it.
+        for links in executor.map(get_all_links, START_URLS):
+            all_site_links.update(links)
+
+        # 2. Scrape the content from each unique link and 3. stream each page to the
+        # JSONL file as it arrives, so memory stays flat regardless of crawl size.
+        # Requests overlap across workers, while the per-host limiter in fetch()
+        # keeps us a good web citizen.
+        try:
+            # Ensure the 'data' directory exists
+            os.makedirs(os.path.dirname(SAVE_PATH), exist_ok=True)
+
+            with open(SAVE_PATH, 'wb') as f:
+                for content_dict in executor.map(scrape_page_content, sorted(all_site_links)):
+                    if content_dict and content_dict['content']:
+                        f.write(orjson.dumps(content_dict) + b"\n")
+        except Exception as e:
+            pass
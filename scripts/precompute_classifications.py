@@ -1,55 +1,186 @@
 import os
-import json
+import logging
+import sqlite3
 import time
+import hashlib
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
-from pipeline.classifier import classify_ticket
+from pipeline.classifier import classify_tickets_batch, REQUESTS_PER_MINUTE, RATE_LIMIT_PERIOD
+from pipeline.ratelimit import RateLimiter
 
 # --- Configuration ---
 INPUT_FILENAME = "data/sample_tickets.json"
 OUTPUT_FILENAME = "data/classified_tickets.json"
+# Completed batches are appended here as they finish, so a crash doesn't lose work
+PARTIAL_FILENAME = "data/classified_tickets.partial.jsonl"
+# Successful classifications keyed by sha256(ticket body); reused across runs
+CACHE_FILENAME = "data/classification_cache.sqlite"
+CACHE_COMMIT_EVERY = 50
+
+# Tickets sent to the LLM per request, and requests allowed in flight at once
+BATCH_SIZE = 10
+MAX_WORKERS = 3
+# A batch hit by a rate-limit (HTTP 429) error is retried this many times, backing off
+# exponentially from one full quota window
+MAX_RETRIES = 3
+
+# Progress messages are INFO; set LOG_LEVEL=INFO to see them. Errors always show.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING")
+
+logger = logging.getLogger(__name__)
+
+# --- Helpers ---
+
+def body_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+def load_previous_results() -> list:
+    """Classified tickets from the last complete run and from an interrupted one, if any."""
+    previous = []
+    try:
+        with open(OUTPUT_FILENAME, 'rb') as f:
+            previous.extend(orjson.loads(f.read()))
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        pass
+    try:
+        with open(PARTIAL_FILENAME, 'rb') as f:
+            for line in f:
+                try:
+                    previous.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    # A crash can leave the last line half-written
+                    continue
+    except FileNotFoundError:
+        pass
+    return previous
+
+def open_cache() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(CACHE_FILENAME), exist_ok=True)
+    conn = sqlite3.connect(CACHE_FILENAME)
+    conn.execute("CREATE TABLE IF NOT EXISTS classifications (body_sha256 TEXT PRIMARY KEY, result_json TEXT)")
+    # Earlier outputs seed the cache, so resumed and repeated runs skip those LLM calls
+    for ticket in load_previous_results():
+        result = ticket.get("classification") or {}
+        if ticket.get("body") and result and "error" not in result:
+            conn.execute(
+                "INSERT OR IGNORE INTO classifications VALUES (?, ?)",
+                (body_hash(ticket["body"]), orjson.dumps(result).decode("utf-8")),
+            )
+    conn.commit()
+    return conn
 
 # --- Main Execution ---
 
 if __name__ == "__main__":
-    print("🚀 Starting Ticket Classification Process (with rate limit handling)...")
+    logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
+    logger.info("🚀 Starting Ticket Classification Process (with rate limit handling)...")
 
     # 1. Read tickets from the input JSON file
     try:
-        with open(INPUT_FILENAME, 'r', encoding='utf-8') as f:
-            all_tickets = json.load(f)
-        print(f"✅ Successfully loaded {len(all_tickets)} tickets from '{INPUT_FILENAME}'.")
+        with open(INPUT_FILENAME, 'rb') as f:
+            all_tickets = orjson.loads(f.read())
+        logger.info("✅ Successfully loaded %d tickets from '%s'.", len(all_tickets), INPUT_FILENAME)
     except FileNotFoundError:
-        print(f"🚨 Error: Input file '{INPUT_FILENAME}' not found.")
+        logger.error("🚨 Error: Input file '%s' not found.", INPUT_FILENAME)
         exit()
-    except json.JSONDecodeError:
-        print(f"🚨 Error: Could not decode JSON from '{INPUT_FILENAME}'.")
+    except orjson.JSONDecodeError:
+        logger.error("🚨 Error: Could not decode JSON from '%s'.", INPUT_FILENAME)
         exit()
 
-    # 2. Classify each ticket with a delay and progress bar
-    classification_results = []
-    # tqdm creates a smart progress bar for the loop
-    for ticket in tqdm(all_tickets, desc="Classifying Tickets"):
-        ticket_body = ticket.get("body")
-        if not ticket_body:
-            continue
+    # 2. Classify tickets in batches, with a token bucket instead of a fixed sleep per call
+    tickets = [ticket for ticket in all_tickets if ticket.get("body")]
+
+    cache = open_cache()
+    cached_results = {}
+    for ticket in tickets:
+        h = body_hash(ticket["body"])
+        row = cache.execute("SELECT result_json FROM classifications WHERE body_sha256 = ?", (h,)).fetchone()
+        if row:
+            cached_results[h] = orjson.loads(row[0])
+    # Identical bodies are classified once
+    to_classify = list({
+        body_hash(ticket["body"]): ticket for ticket in tickets if body_hash(ticket["body"]) not in cached_results
+    }.values())
+    logger.info(
+        "♻️ Reusing %d cached classifications; %d unique tickets left to classify.",
+        len(tickets) - len(to_classify), len(to_classify),
+    )
+
+    batches = [to_classify[i:i + BATCH_SIZE] for i in range(0, len(to_classify), BATCH_SIZE)]
+    limiter = RateLimiter(REQUESTS_PER_MINUTE, RATE_LIMIT_PERIOD)
+
+    def classify_batch(batch):
+        for attempt in range(MAX_RETRIES + 1):
+            limiter.acquire()
+            results = classify_tickets_batch([ticket["body"] for ticket in batch])
+            rate_limited = any("429" in str(result.get("error", "")) for result in results)
+            if not rate_limited or attempt == MAX_RETRIES:
+                break
+            time.sleep(RATE_LIMIT_PERIOD * (2 ** attempt))
+        classified = []
+        for ticket, result in zip(batch, results):
+            # Combine original ticket info with the new classification
+            classified_ticket = ticket.copy()
+            classified_ticket['classification'] = result
+            classified.append(classified_ticket)
+        return classified
 
-        # Call the classification function
-        result = classify_ticket(ticket_body)
+    os.makedirs(os.path.dirname(PARTIAL_FILENAME), exist_ok=True)
+    uncommitted = 0
+    with open(PARTIAL_FILENAME, 'ab') as partial, ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(classify_batch, batch) for batch in batches]
+        # tqdm creates a smart progress bar for the loop; redraws are capped at once a
+        # second so the stderr lock isn't contended on every finished batch
+        with tqdm(total=len(to_classify), desc="Classifying Tickets", mininterval=1.0, smoothing=0.1) as progress:
+            for future in as_completed(futures):
+                classified = future.result()
+                partial.write(b"".join(orjson.dumps(ticket) + b"\n" for ticket in classified))
+                partial.flush()
+                for ticket in classified:
+                    result = ticket['classification']
+                    h = body_hash(ticket["body"])
+                    cached_results[h] = result
+                    # Failures are not cached so the next run retries them
+                    if "error" not in result:
+                        cache.execute(
+                            "INSERT OR REPLACE INTO classifications VALUES (?, ?)",
+                            (h, orjson.dumps(result).decode("utf-8")),
+                        )
+                        uncommitted += 1
+                if uncommitted >= CACHE_COMMIT_EVERY:
+                    cache.commit()
+                    uncommitted = 0
+                progress.update(len(classified))
+    cache.commit()
+    cache.close()
 
-        # Combine original ticket info with the new classification
+    classification_results = []
+    failed_tickets = []
+    for ticket in tickets:
+        result = cached_results[body_hash(ticket["body"])]
+        # Failures are left out rather than saved as classifications; they aren't cached,
+        # so the next run retries them
+        if "error" in result:
+            failed_tickets.append((ticket.get("id", "N/A"), result["error"]))
+            continue
         classified_ticket = ticket.copy()
         classified_ticket['classification'] = result
         classification_results.append(classified_ticket)
-        
-        # --- THIS IS THE CRITICAL FIX ---
-        # Wait for 4 seconds to stay under the 15 requests/minute free tier limit.
-        time.sleep(4)
+
+    if failed_tickets:
+        logger.error(
+            "🚨 %d of %d tickets could not be classified and were not saved; rerun to retry them.",
+            len(failed_tickets), len(tickets),
+        )
+        for ticket_id, error in failed_tickets:
+            logger.error("  - %s: %s", ticket_id, error)
 
     # 3. Write the complete results to the output file
     try:
-        with open(OUTPUT_FILENAME, 'w', encoding='utf-8') as f:
-            json.dump(classification_results, f, indent=4)
-        print(f"\n✨ Process complete. All classified tickets have been saved to '{OUTPUT_FILENAME}'.")
+        with open(OUTPUT_FILENAME, 'wb') as f:
+            f.write(orjson.dumps(classification_results, option=orjson.OPT_INDENT_2))
+        os.remove(PARTIAL_FILENAME)
+        logger.info("✨ Process complete. %d classified tickets have been saved to '%s'.", len(classification_results), OUTPUT_FILENAME)
     except Exception as e:
-        print(f"\n🚨 Error: Could not write results. Reason: {e}")
-
+        logger.error("🚨 Error: Could not write results. Reason: %s", e)
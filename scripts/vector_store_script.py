@@ -1,73 +1,135 @@
 import os
 import json
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.docstore.document import Document
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
+import sqlite3
+import chromadb
+from chromadb.errors import ChromaError
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+from sentence_transformers.quantization import quantize_embeddings
+from pipeline.chunking import split_documents, deduplicate_chunks, chunks_by_id
+from pipeline.embeddings import EMBEDDING_MODEL_NAME, best_device
+from pipeline.rag import HNSW_COLLECTION_METADATA, create_documents_from_data, iter_knowledge_base
 
 # --- Configuration ---
 KNOWLEDGE_BASE_PATH = "data/knowledge_base.json"
 # Updated save path to be specific to ChromaDB
 VECTOR_STORE_SAVE_PATH = "data/chroma_db"
 
-# Configuration for the text splitter
-CHUNK_SIZE = 1000  # The number of characters in each chunk
-CHUNK_OVERLAP = 100 # The number of characters to overlap between chunks
+# langchain_chroma's default collection, which RAGPipeline opens at query time
+COLLECTION_NAME = "langchain"
 
-# We will use a powerful, open-source embedding model.
-# "all-MiniLM-L6-v2" is a great starting point - it's fast and effective.
-EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# Chunks per encoder forward pass (larger on CUDA, where FP16 halves activation memory), and per Chroma insert
+ENCODE_BATCH_SIZE = 256
+CUDA_ENCODE_BATCH_SIZE = 512
+ADD_BATCH_SIZE = 250
+
+# Chroma's SQLite file. WAL mode is stored in the database itself, so setting it once
+# applies to the connections Chroma opens afterwards.
+SQLITE_FILENAME = "chroma.sqlite3"
+
+# Optionally also write int8 scalar-quantized embeddings (4x smaller than FP32) next to the store,
+# row-aligned with their Chroma ids, for memory-mapped client-side reranking (see load_int8_embeddings).
+# Enable with WRITE_INT8_EMBEDDINGS=1.
+WRITE_INT8_EMBEDDINGS = os.getenv("WRITE_INT8_EMBEDDINGS", "").lower() in ("1", "true", "yes")
+INT8_EMBEDDINGS_FILE = "embeddings_int8.npy"
+INT8_IDS_FILE = "embeddings_int8_ids.json"
 
 # --- Core Logic ---
 
 def load_knowledge_base(filepath: str) -> list:
-    """Loads the scraped data from the JSON file."""
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
-    except FileNotFoundError:
-        return []
-    except json.JSONDecodeError:
-        return []
-
-def create_documents_from_data(data: list) -> list:
-    """Converts the raw data into LangChain's Document format."""
-    documents = [
-        Document(page_content=item['content'], metadata={'source': item['url']})
-        for item in data if item.get('content')
-    ]
-    return documents
-
-def split_documents(documents: list) -> list:
-    """Splits the documents into smaller chunks using the recursive strategy."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-        add_start_index=True,
+    """Loads the scraped data from the JSON Lines (or legacy JSON array) file."""
+    return list(iter_knowledge_base(filepath))
+
+def save_int8_embeddings(embeddings: np.ndarray, ids: list, save_path: str):
+    """
+    Quantizes FP32 embeddings to int8 (ranges calibrated on up to 10k rows) and saves them
+    as a .npy that can be opened with np.load(..., mmap_mode="r"), plus the matching ids.
+    """
+    int8_embeddings = quantize_embeddings(
+        embeddings, precision="int8", calibration_embeddings=embeddings[:10_000]
     )
-    chunked_documents = text_splitter.split_documents(documents)
-    return chunked_documents
+    os.makedirs(save_path, exist_ok=True)
+    np.save(os.path.join(save_path, INT8_EMBEDDINGS_FILE), int8_embeddings)
+    with open(os.path.join(save_path, INT8_IDS_FILE), 'w', encoding='utf-8') as f:
+        json.dump(ids, f)
+
+def load_int8_embeddings(save_path: str) -> tuple:
+    """
+    Opens the int8 sidecar written by save_int8_embeddings as a read-only memory map,
+    so rows are paged in on demand. Returns (embeddings, ids); row i belongs to ids[i].
+    """
+    int8_embeddings = np.load(os.path.join(save_path, INT8_EMBEDDINGS_FILE), mmap_mode="r")
+    with open(os.path.join(save_path, INT8_IDS_FILE), 'r', encoding='utf-8') as f:
+        ids = json.load(f)
+    if len(ids) != int8_embeddings.shape[0]:
+        raise ValueError(
+            f"int8 sidecar in '{save_path}' has {int8_embeddings.shape[0]} rows but {len(ids)} ids; rebuild the store."
+        )
+    return int8_embeddings, ids
+
+def tune_sqlite_for_build(save_path: str):
+    """Switches Chroma's SQLite file to WAL so batched inserts append to a log instead of rewriting pages."""
+    conn = sqlite3.connect(os.path.join(save_path, SQLITE_FILENAME))
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
 
 def build_and_save_vector_store(chunks: list, save_path: str):
     """
-    Creates embeddings for the chunks and builds a ChromaDB vector store,
-    then saves it to disk.
+    Creates embeddings for the chunks in large batches and writes them,
+    batch by batch, into a persistent ChromaDB collection.
     """
     if not chunks:
         return
 
     # Initialize the embedding model. It might download the model files on the first run.
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
-
-    # Chroma will automatically create and save the database in the specified directory.
-    # The `persist_directory` argument tells Chroma to save the data to disk.
-    vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=save_path
-    )
+    device = best_device()
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME, device=device)
+    batch_size = ENCODE_BATCH_SIZE
+    if device == "cuda":
+        # FP16 weights roughly double encoder throughput on tensor-core GPUs
+        model.half()
+        batch_size = CUDA_ENCODE_BATCH_SIZE
+
+    # Inserted in id order; duplicates (same source and offset) are dropped
+    indexed = chunks_by_id(chunks)
+    ids = list(indexed)
+    texts = [chunk.page_content for chunk in indexed.values()]
+    metadatas = [chunk.metadata for chunk in indexed.values()]
+
+    # Normalized to match the query-time embeddings used by RAGPipeline
+    with torch.inference_mode():
+        embeddings = model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=True,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        ).astype("float32")
+
+    if WRITE_INT8_EMBEDDINGS:
+        save_int8_embeddings(embeddings, ids, save_path)
+
+    # Chroma persists everything written through a PersistentClient to `save_path`.
+    client = chromadb.PersistentClient(path=save_path)
+    tune_sqlite_for_build(save_path)
+    # A rebuild starts from an empty collection: upserting alone would leave chunks whose ids
+    # no longer exist (edited pages, dropped duplicates) and keep the old HNSW settings.
+    try:
+        client.delete_collection(COLLECTION_NAME)
+    except (ValueError, ChromaError):
+        # Nothing to delete on a first build
+        pass
+    collection = client.create_collection(COLLECTION_NAME, metadata=HNSW_COLLECTION_METADATA)
+    for i in range(0, len(texts), ADD_BATCH_SIZE):
+        collection.upsert(
+            ids=ids[i:i + ADD_BATCH_SIZE],
+            documents=texts[i:i + ADD_BATCH_SIZE],
+            embeddings=embeddings[i:i + ADD_BATCH_SIZE].tolist(),
+            metadatas=metadatas[i:i + ADD_BATCH_SIZE],
+        )
 
 # --- Main Execution ---
 
@@ -82,6 +144,9 @@ if __name__ == "__main__":
         # 3. Split the documents into chunks
         chunked_docs = split_documents(documents)
 
-        # 4. Build and save the vector store
+        # 4. Drop near-duplicate chunks before paying to embed and index them
+        chunked_docs = deduplicate_chunks(chunked_docs)
+
+        # 5. Build and save the vector store
         build_and_save_vector_store(chunked_docs, VECTOR_STORE_SAVE_PATH)
 
@@ -1,14 +1,15 @@
+import html
 import os
 import sys
-import json
 from typing import List, Dict, Any
 
+import orjson
 import streamlit as st
 import re
 
 # Optional deps used by dashboard table; app works without them
 try:
-    import pandas as pd  # noqa: F401
+    import pandas as pd
 except Exception:
     pd = None  # type: ignore
 
@@ -37,24 +38,55 @@ st.set_page_config(
 
 PRIMARY_TAGS_DIRECT_ANSWER = {"How-to", "Product", "Best practices", "API/SDK", "SSO"}
 
+# Pre-compiled patterns for the hot render paths (answer sanitizing, dashboard rows)
+_BULLET_RE = re.compile(r"^\s*([*\-•]+)\s+")
+_EMPH_RE = re.compile(r"\*\*|__|\*")
+_TICKET_ID_RE = re.compile(r"\b[A-Z]{2,}-\d+\b")
+# Start of an embedded "Sources:" section, e.g. "\nSource:", "\n**Sources:**", "\n📚 Sources:"
+_SOURCES_RE = re.compile(r"\n(?:\*\*)?(?:📚\s*)?Sources?:", re.IGNORECASE)
 
-def load_classified_tickets() -> List[Dict[str, Any]]:
-    data_path = os.path.join(os.path.dirname(__file__), "data", "classified_tickets.json")
-    if not os.path.exists(data_path):
-        return []
+
+CLASSIFIED_TICKETS_PATH = os.path.join(os.path.dirname(__file__), "data", "classified_tickets.json")
+
+
+@st.cache_data(show_spinner=False)
+def _load_tickets_cached(path: str, mtime: float) -> List[Dict[str, Any]]:
+    # `mtime` is only part of the cache key so edits to the file invalidate the entry
     try:
-        with open(data_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
     except Exception:
         return []
 
 
+def load_classified_tickets() -> List[Dict[str, Any]]:
+    data_path = CLASSIFIED_TICKETS_PATH
+    try:
+        mtime = os.path.getmtime(data_path)
+    except OSError:
+        return []
+    return _load_tickets_cached(data_path, mtime)
+
+
+@st.cache_data(show_spinner=False)
+def _tickets_filter_frame(path: str, mtime: float):
+    """Lowercased filter columns for the dashboard, one row per ticket in file order."""
+    ids, sentiments, priorities = [], [], []
+    for ticket in _load_tickets_cached(path, mtime):
+        classification = ticket.get("classification", {}) or {}
+        ids.append(str(ticket.get("id") or ticket.get("ticket_id") or "").lower())
+        sentiments.append(str(classification.get("sentiment", "")).lower())
+        priorities.append(str(classification.get("priority", "")).lower())
+    return pd.DataFrame({"id": ids, "sentiment": sentiments, "priority": priorities})
+
+
 def save_classified_tickets(tickets: List[Dict[str, Any]]) -> bool:
-    data_path = os.path.join(os.path.dirname(__file__), "data", "classified_tickets.json")
+    data_path = CLASSIFIED_TICKETS_PATH
     try:
         os.makedirs(os.path.dirname(data_path), exist_ok=True)
-        with open(data_path, "w", encoding="utf-8") as f:
-            json.dump(tickets, f, indent=2, ensure_ascii=False)
+        with open(data_path, "wb") as f:
+            f.write(orjson.dumps(tickets, option=orjson.OPT_INDENT_2))
+        _load_tickets_cached.clear()
         return True
     except Exception:
         return False
@@ -97,33 +129,26 @@ def render_priority_badge(priority: str) -> str:
     )
 
 
-def render_card(title: str, body_md: str) -> None:
-    st.markdown(
-        f"""
-        <div style='border:1px solid #e5e7eb;border-radius:12px;padding:16px;background:white;'>
-            <div style='font-weight:700;font-size:16px;margin-bottom:8px;color:#111827;'>{title}</div>
-            <div style='color:#111827;'>
-                {body_md}
-            </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
+def card_html(title: str, body_md: str) -> str:
+    # Kept unindented so several cards can be joined into one markdown block
+    return (
+        f"<div style='border:1px solid #e5e7eb;border-radius:12px;padding:16px;background:white;'>"
+        f"<div style='font-weight:700;font-size:16px;margin-bottom:8px;color:#111827;'>{title}</div>"
+        f"<div style='color:#111827;'>{body_md}</div>"
+        f"</div>"
     )
 
 
+def render_card(title: str, body_md: str) -> None:
+    st.markdown(card_html(title, body_md), unsafe_allow_html=True)
+
+
 def strip_sources_from_answer(answer_text: str) -> str:
     """Remove any embedded Sources sections from an LLM answer to avoid duplication."""
     if not answer_text:
         return ""
-    # Common markers for sources sections
-    markers = ["\nSources:", "\nSource:", "\n**Sources:**", "\n**Source:**", "\n📚 Sources:"]
-    cut_idx = None
-    for m in markers:
-        idx = answer_text.lower().find(m.lower())
-        if idx != -1:
-            cut_idx = idx
-            break
-    return answer_text[:cut_idx].rstrip() if cut_idx is not None else answer_text
+    m = _SOURCES_RE.search(answer_text)
+    return answer_text[:m.start()].rstrip() if m else answer_text
 
 
 def format_answer_points(answer_text: str) -> str:
@@ -132,9 +157,9 @@ def format_answer_points(answer_text: str) -> str:
 
     def sanitize_line(text: str) -> str:
         # Remove markdown bullets and leading symbols
-        text = re.sub(r"^\s*([*\-•]+)\s+", "", text)
+        text = _BULLET_RE.sub("", text)
         # Remove markdown emphasis (bold/italic)
-        text = re.sub(r"\*\*|__|\*", "", text)
+        text = _EMPH_RE.sub("", text)
         # Remove backticks
         text = text.replace("`", "")
         # Trim enclosing quotes only (not inner apostrophes)
@@ -142,8 +167,11 @@ def format_answer_points(answer_text: str) -> str:
             text = text[1:-1]
         return text.strip()
 
-    lines_raw = [ln for ln in cleaned.splitlines() if ln.strip()]
-    lines = [sanitize_line(ln.strip()) for ln in lines_raw if sanitize_line(ln.strip())]
+    lines = []
+    for ln in cleaned.splitlines():
+        text = sanitize_line(ln.strip())
+        if text:
+            lines.append(text)
     if not lines:
         return ""
     summary = lines[0]
@@ -155,6 +183,35 @@ def format_answer_points(answer_text: str) -> str:
     return f"<div style='font-weight:600;margin-bottom:4px;'>{summary}</div>{bullets_html}"
 
 
+class _ClassificationFailed(Exception):
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result.get("error"))
+        self.result = result
+
+
+@st.cache_data(ttl=86400, max_entries=5000, show_spinner=False)
+def _classify_cached(text: str) -> Dict[str, Any]:
+    result = classify_ticket(text)
+    if "error" in result:
+        # Raising keeps failures (rate limits, timeouts) out of the cache
+        raise _ClassificationFailed(result)
+    return result
+
+
+def cached_classify(text: str) -> Dict[str, Any]:
+    """Classify a ticket, reusing results for identical ticket text."""
+    try:
+        return _classify_cached(text)
+    except _ClassificationFailed as e:
+        return e.result
+
+
+@st.cache_resource(show_spinner=False)
+def get_rag_pipeline() -> RAGPipeline:
+    """Shared RAG pipeline (embedding model + vector store) for all sessions."""
+    return RAGPipeline()
+
+
 # ------------------------
 # Title
 # ------------------------
@@ -189,7 +246,7 @@ with tab_dashboard:
         submit_new = st.button("Classify and Add to Dashboard")
         if submit_new and new_subject.strip() and new_body.strip():
             # Classify and append
-            result = classify_ticket(new_body.strip())
+            result = cached_classify(new_body.strip())
             if "error" in result:
                 st.error(f"Classification failed: {result['error']}")
             else:
@@ -247,10 +304,26 @@ with tab_dashboard:
 
             return ok_id and ok_sent and ok_pri
 
-        tickets = [t for t in tickets if match_filters(t)]
+        has_filters = filter_id.strip() or filter_sentiment != "All" or filter_priority != "All"
+        df = None
+        if has_filters and pd is not None:
+            df = _tickets_filter_frame(CLASSIFIED_TICKETS_PATH, os.path.getmtime(CLASSIFIED_TICKETS_PATH))
+        if df is not None and len(df) == len(tickets):
+            mask = pd.Series(True, index=df.index)
+            if filter_id.strip():
+                mask &= df["id"].str.contains(filter_id.strip().lower(), regex=False)
+            if filter_sentiment != "All":
+                mask &= df["sentiment"] == filter_sentiment.lower()
+            if filter_priority != "All":
+                mask &= df["priority"].str.startswith(filter_priority.split()[0].lower())
+            tickets = [tickets[i] for i in mask.to_numpy().nonzero()[0]]
+        elif has_filters:
+            tickets = [t for t in tickets if match_filters(t)]
     if not tickets:
         st.info("No pre-analyzed tickets found. Generate `data/classified_tickets.json` to populate this dashboard.")
     else:
+        # Render every card in one markdown call instead of one websocket message per ticket
+        html_parts = []
         for t in tickets:
             ticket_id = t.get("id") or t.get("ticket_id") or t.get("Ticket ID") or ""
             subject = t.get("subject") or t.get("title") or t.get("Ticket Subject") or "Untitled Ticket"
@@ -262,9 +335,14 @@ with tab_dashboard:
 
             # If no ID present, try to extract mentioned ID like TICKET-245 from subject/body
             if not ticket_id:
-                m = re.search(r"\b[A-Z]{2,}-\d+\b", f"{subject}\n{body_text}")
+                m = _TICKET_ID_RE.search(f"{subject}\n{body_text}")
                 ticket_id = m.group(0) if m else "—"
 
+            # Ticket content is user-supplied; escape it before embedding in HTML
+            ticket_id = html.escape(str(ticket_id))
+            subject = html.escape(str(subject))
+            body_text = html.escape(str(body_text))
+
             badges_html = "".join([render_badge(str(tag)) for tag in topic_tags])
             sentiment_text = sentiment_to_icon_text(sentiment)
             priority_html = render_priority_badge(priority or "P2 (Low)")
@@ -285,8 +363,9 @@ with tab_dashboard:
                 f"</div>"
                 f"</div>"
             )
-            render_card("Ticket", body)
-            st.markdown("<div style='height:10px;'></div>", unsafe_allow_html=True)
+            html_parts.append(card_html("Ticket", body))
+            html_parts.append("<div style='height:10px;'></div>")
+        st.markdown("\n".join(html_parts), unsafe_allow_html=True)
 
 
 # ------------------------
@@ -316,7 +395,7 @@ with tab_agent:
 
     if analyze and user_input.strip():
         with st.spinner("Analyzing ticket and preparing response..."):
-            classification = classify_ticket(user_input.strip())
+            classification = cached_classify(user_input.strip())
 
         # Internal Analysis Card
         if "error" in classification:
@@ -351,9 +430,7 @@ with tab_agent:
 
             if should_answer_directly:
                 try:
-                    if "rag_pipeline" not in st.session_state:
-                        st.session_state["rag_pipeline"] = RAGPipeline()
-                    rag = st.session_state["rag_pipeline"]
+                    rag = get_rag_pipeline()
                     with st.spinner("Generating answer with knowledge base..."):
                         # Slight hinting by appending preferred domains into the query for retrieval bias
                         hint = " Prefer official documentation from docs.atlan.com and developer.atlan.com."
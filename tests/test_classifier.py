@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from pipeline import classifier
+from pipeline.classifier import _parse_llm_json, classify_tickets_batch
+
+CLASSIFICATION = {"topic_tags": ["SSO"], "sentiment": "Neutral", "priority": "P1 (Medium)"}
+
+
+class StubModel:
+    def __init__(self, response_text):
+        self.response_text = response_text
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text=self.response_text)
+
+
+def use_model(monkeypatch, response_text):
+    model = StubModel(response_text)
+    monkeypatch.setattr(classifier, "get_genai", lambda: SimpleNamespace(GenerativeModel=lambda name: model))
+    return model
+
+
+def test_batch_results_map_back_to_input_order(monkeypatch):
+    first = dict(CLASSIFICATION, topic_tags=["Connector"])
+    second = dict(CLASSIFICATION, topic_tags=["Lineage"], extra="dropped")
+    model = use_model(monkeypatch, "```json\n" + orjson.dumps([first, second]).decode() + "\n```")
+
+    results = classify_tickets_batch(["   ", "Snowflake connector fails", "ok", "Lineage is missing"])
+
+    assert "error" in results[0]
+    assert results[1] == first
+    # Trivial tickets are answered without the LLM
+    assert results[2] == {"topic_tags": [], "sentiment": "Neutral", "priority": "P2 (Low)"}
+    assert results[3] == {key: second[key] for key in classifier.REQUIRED_KEYS}
+    # Only the two real tickets were sent, numbered from 0
+    assert len(model.prompts) == 1
+    assert "Ticket 0:" in model.prompts[0] and "Ticket 1:" in model.prompts[0]
+    assert "Ticket 2:" not in model.prompts[0]
+
+
+def test_wrong_length_response_fails_only_pending_tickets(monkeypatch):
+    use_model(monkeypatch, orjson.dumps([CLASSIFICATION]).decode())
+
+    results = classify_tickets_batch(["hi", "Snowflake connector fails", "Lineage is missing"])
+
+    assert results[0] == {"topic_tags": [], "sentiment": "Neutral", "priority": "P2 (Low)"}
+    assert "Batch classification failed" in results[1]["error"]
+    assert "Batch classification failed" in results[2]["error"]
+    # Each ticket gets its own error dict
+    assert results[1] is not results[2]
+
+
+def test_incomplete_item_gets_an_error(monkeypatch):
+    use_model(monkeypatch, orjson.dumps([CLASSIFICATION, {"sentiment": "Angry"}]).decode())
+
+    results = classify_tickets_batch(["Snowflake connector fails", "Lineage is missing"])
+
+    assert results[0] == CLASSIFICATION
+    assert "missing" in results[1]["error"]
+
+
+def test_batch_without_llm_work_makes_no_call(monkeypatch):
+    model = use_model(monkeypatch, "[]")
+    assert len(classify_tickets_batch(["", "ok"])) == 2
+    assert model.prompts == []
+
+
+def test_parse_llm_json_is_strict_first():
+    assert _parse_llm_json('{"priority": "P0 (High)"}') == {"priority": "P0 (High)"}
+
+
+def test_parse_llm_json_falls_back_to_json5():
+    pytest.importorskip("json5")
+    assert _parse_llm_json("{priority: 'P0 (High)', topic_tags: ['SSO',],}") == {
+        "priority": "P0 (High)",
+        "topic_tags": ["SSO"],
+    }
+
+
+def test_parse_llm_json_reraises_the_strict_error():
+    pytest.importorskip("json5")
+    with pytest.raises(orjson.JSONDecodeError):
+        _parse_llm_json("not json at all")
+
+
+def test_parse_llm_json_without_json5(monkeypatch):
+    monkeypatch.setattr(classifier, "json5", None)
+    with pytest.raises(orjson.JSONDecodeError):
+        _parse_llm_json('{"priority": "P0 (High)",}')
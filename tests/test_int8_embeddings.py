@@ -0,0 +1,41 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("sentence_transformers")
+
+from scripts.vector_store_script import INT8_IDS_FILE, load_int8_embeddings, save_int8_embeddings
+
+
+def make_embeddings(rows, dims=16):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((rows, dims)).astype("float32")
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def test_int8_sidecar_round_trips_as_a_memory_map(tmp_path):
+    embeddings = make_embeddings(50)
+    ids = [f"id-{i:03d}" for i in range(50)]
+
+    save_int8_embeddings(embeddings, ids, str(tmp_path))
+    int8_embeddings, loaded_ids = load_int8_embeddings(str(tmp_path))
+
+    assert isinstance(int8_embeddings, np.memmap)
+    assert int8_embeddings.dtype == np.int8
+    assert int8_embeddings.shape == embeddings.shape
+    assert loaded_ids == ids
+    # Quantization keeps each dimension's ordering, so rows still line up with their ids
+    for dim in range(embeddings.shape[1]):
+        order = np.argsort(embeddings[:, dim], kind="stable")
+        assert np.all(np.diff(int8_embeddings[order, dim].astype(int)) >= 0)
+
+
+def test_misaligned_sidecar_is_rejected(tmp_path):
+    save_int8_embeddings(make_embeddings(10), [f"id-{i}" for i in range(10)], str(tmp_path))
+    with open(tmp_path / INT8_IDS_FILE, "w", encoding="utf-8") as f:
+        json.dump(["id-0"], f)
+
+    with pytest.raises(ValueError):
+        load_int8_embeddings(str(tmp_path))
@@ -0,0 +1,61 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain_chroma")
+
+from pipeline.rag import RAGPipeline, RETRIEVAL_K
+
+
+class StubVectorStore:
+    """Ranks a fixed list of docs; honours the {"official": True} filter like Chroma does."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def similarity_search_by_vector(self, query_vector, k=4, filter=None):
+        docs = self.docs
+        if filter:
+            docs = [doc for doc in docs if all(doc.metadata.get(key) == value for key, value in filter.items())]
+        return docs[:k]
+
+
+class StubLLM:
+    def generate_content(self, prompt):
+        return SimpleNamespace(text="answer")
+
+
+def make_pipeline(docs):
+    # Skip __init__ so no embedder, Chroma store or Gemini client is loaded
+    rag = RAGPipeline.__new__(RAGPipeline)
+    rag.vector_store = StubVectorStore(docs)
+    rag.llm = StubLLM()
+    return rag
+
+
+def make_doc(i, official):
+    source = f"https://docs.atlan.com/page-{i}" if official else f"https://community.example.com/page-{i}"
+    return SimpleNamespace(page_content=f"chunk {i}", metadata={"source": source, "official": official})
+
+
+def test_all_official_store_fills_retrieval_budget():
+    rag = make_pipeline([make_doc(i, official=True) for i in range(20)])
+    result = rag.get_rag_answer_from_embedding([0.0], "question")
+    assert result["context_used"] == RETRIEVAL_K
+
+
+def test_official_docs_come_first_and_are_topped_up():
+    rag = make_pipeline([make_doc(i, official=i % 2 == 0) for i in range(20)])
+    prompts = []
+    rag.llm = SimpleNamespace(generate_content=lambda prompt: prompts.append(prompt) or SimpleNamespace(text="answer"))
+    result = rag.get_rag_answer_from_embedding([0.0], "question")
+    assert result["context_used"] == RETRIEVAL_K
+    # The six best official chunks lead, then the best chunks not already included
+    assert re.findall(r"chunk \d+", prompts[0]) == [f"chunk {i}" for i in (0, 2, 4, 6, 8, 10, 1, 3)]
+
+
+def test_small_store_returns_every_unique_chunk():
+    rag = make_pipeline([make_doc(i, official=True) for i in range(3)])
+    result = rag.get_rag_answer_from_embedding([0.0], "question")
+    assert result["context_used"] == 3
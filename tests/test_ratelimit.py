@@ -0,0 +1,46 @@
+import time
+import threading
+
+from pipeline.ratelimit import RateLimiter
+
+
+def test_calls_within_rate_do_not_wait():
+    limiter = RateLimiter(3, 1.0)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    # A blocked call would wait the full 1s window
+    assert time.monotonic() - start < 0.5
+
+
+def test_extra_call_waits_for_the_window_to_slide():
+    limiter = RateLimiter(2, 0.3)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.3
+
+
+def test_concurrent_callers_share_the_budget():
+    limiter = RateLimiter(4, 0.5)
+    acquired_at = []
+    lock = threading.Lock()
+
+    def worker():
+        limiter.acquire()
+        with lock:
+            acquired_at.append(time.monotonic())
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Only 4 of the 8 callers fit in the first window; the rest can't be admitted before it
+    # ends. Timestamps are taken after acquire() returns, so scheduling delay only makes
+    # them later and can't fail these lower bounds.
+    acquired_at.sort()
+    assert len(acquired_at) == 8
+    assert all(t - start >= 0.5 for t in acquired_at[4:])